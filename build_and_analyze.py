@@ -6,8 +6,11 @@ A more reliable Python version of the build script.
 
 import os
 import sys
+import queue
 import shutil
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 
@@ -48,31 +51,45 @@ def verify_gradle():
         print_color(f"  ❌ Error checking Gradle: {e}", Colors.RED)
         return False
 
+GRADLE_PERFORMANCE_ARGS = ['--parallel', '--build-cache', '--configure-on-demand']
+
+LOG_BUFFER_SIZE = 1 << 16
+
 def clean_gradle_caches():
-    """Clean Gradle caches."""
+    """Clean the project-local Gradle caches.
+    
+    The user-global ~/.gradle/caches is left alone so dependencies and
+    build cache entries survive across builds.
+    """
     print("Cleaning Gradle caches...")
     try:
-        # Clean Gradle caches
-        caches = [
-            os.path.expanduser('~/.gradle/caches/'),
-            os.path.join(os.getcwd(), '.gradle/caches/')
-        ]
-        
-        for cache_dir in caches:
-            if os.path.exists(cache_dir):
-                print(f"  Removing cache: {cache_dir}")
-                shutil.rmtree(cache_dir, ignore_errors=True)
-        
-        # Stop any running daemons
-        run_gradle_task(["--stop"], "gradle_stop.log")
+        cache_dir = os.path.join(os.getcwd(), '.gradle/caches/')
+        if os.path.exists(cache_dir):
+            print(f"  Removing cache: {cache_dir}")
+            shutil.rmtree(cache_dir, ignore_errors=True)
         return True
     except Exception as e:
         print_color(f"  ⚠️  Failed to clean Gradle caches: {e}", Colors.YELLOW)
         return False
 
-def clean_directories():
-    """Clean build directories."""
+def clean_directories(deep_clean=False):
+    """Clean build directories.
+    
+    The Gradle `clean` task itself is run together with the build in main(),
+    so both phases share a single daemon session.
+    
+    Args:
+        deep_clean: Also purge the project-local Gradle caches and remove
+            the top-level build/, bin/ and out/ directories
+    """
     print("\n=== Cleaning Build Directories ===")
+    
+    # `gradlew clean` already removes per-project outputs; leave .gradle/ and
+    # the module build/ trees alone so Kotlin incremental-compile state survives.
+    # Caches and stray top-level output directories are only removed on a deep clean.
+    if not deep_clean:
+        return True
+    
     success = True
     
     try:
@@ -81,39 +98,29 @@ def clean_directories():
             print_color("❌ Gradle verification failed. Cannot proceed with cleanup.", Colors.RED)
             return False
         
-        # Clean Gradle caches first
         clean_gradle_caches()
         
-        # Run Gradle clean
-        print("Running Gradle clean...")
-        clean_result = run_gradle_task(["clean", "--no-daemon"], "clean.log")
-        if clean_result != 0:
-            print_color("  ⚠️  Gradle clean completed with warnings", Colors.YELLOW)
-        else:
-            print("  ✓ Gradle clean completed")
-        
-        # Remove build directories
         dirs_to_remove = [
             'build',
-            '.gradle',
-            'app/build',
-            'komga/build',
             'bin',
             'out'
         ]
         
-        for dir_name in dirs_to_remove:
-            dir_path = Path(dir_name)
-            if dir_path.exists():
-                try:
+        existing_dirs = [d for d in dirs_to_remove if Path(d).exists()]
+        if existing_dirs:
+            # The trees are independent, so remove them concurrently
+            with ThreadPoolExecutor(max_workers=len(existing_dirs)) as executor:
+                futures = {}
+                for dir_name in existing_dirs:
                     print(f"  Removing directory: {dir_name}")
-                    shutil.rmtree(dir_path, ignore_errors=True)
-                except Exception as e:
-                    print_color(f"  ⚠️  Failed to remove {dir_name}: {e}", Colors.YELLOW)
-                    success = False
-        
-        # Clean Gradle caches again to be thorough
-        clean_gradle_caches()
+                    futures[executor.submit(shutil.rmtree, Path(dir_name), ignore_errors=True)] = dir_name
+                
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print_color(f"  ⚠️  Failed to remove {futures[future]}: {e}", Colors.YELLOW)
+                        success = False
         
         if success:
             print("  ✓ Cleanup completed successfully")
@@ -126,6 +133,15 @@ def clean_directories():
         
     return success
 
+def _drain_pipe(pipe, stream, output_queue):
+    """Push every line of a pipe onto the queue, then a None sentinel."""
+    try:
+        for line in iter(pipe.readline, ''):
+            output_queue.put((stream, line))
+    finally:
+        pipe.close()
+        output_queue.put((stream, None))
+
 def run_gradle_task(gradle_args, log_file):
     """Run Gradle with the given arguments and capture output.
     
@@ -135,88 +151,82 @@ def run_gradle_task(gradle_args, log_file):
     """
     env = os.environ.copy()
     env.update({
-        'GRADLE_OPTS': '-Xmx2048m -Dorg.gradle.daemon=false',
+        'GRADLE_OPTS': '-Xmx2048m',
         'JAVA_OPTS': '-Xmx2048m'
     })
     
     # Prepare the command
+    creationflags = 0
     if os.name == 'nt':
-        # On Windows, use the batch file directly
+        # On Windows, pass gradlew.bat as an argument list rather than a quoted
+        # shell=True string; CreateProcess still runs .bat files through cmd.exe
         gradle_script = os.path.join(os.getcwd(), 'gradlew.bat')
-        cmd = [gradle_script] + gradle_args
-        shell = True
+        creationflags = subprocess.CREATE_NO_WINDOW
     else:
         # On Unix-like systems
         gradle_script = './gradlew'
-        cmd = [gradle_script] + gradle_args
-        shell = False
+    cmd = [gradle_script] + gradle_args
     
     # Log the command
     cmd_str = ' '.join(f'"{arg}"' if ' ' in arg else arg for arg in cmd)
     print_color(f"Running: {cmd_str}", Colors.YELLOW)
-    with open(log_file, 'a', encoding='utf-8') as f:
-        f.write(f"\n=== Running: {cmd_str} ===\n")
+    
+    # Keep the log open for the whole run; output is buffered rather than
+    # reopening the file for every line
+    log_fh = open(log_file, 'a', encoding='utf-8', buffering=LOG_BUFFER_SIZE)
+    log_fh.write(f"\n=== Running: {cmd_str} ===\n")
     
     try:
         # Run the command
         process = subprocess.Popen(
-            cmd_str if os.name == 'nt' else cmd,
+            cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
             env=env,
             bufsize=1,
             universal_newlines=True,
-            shell=shell,
+            shell=False,
+            creationflags=creationflags,
             cwd=os.getcwd()
         )
         
-        # Stream output in real-time
-        while True:
-            # Read from stdout and stderr
-            stdout_line = process.stdout.readline()
-            stderr_line = process.stderr.readline()
-            
-            # Process stdout
-            if stdout_line:
-                print(stdout_line.strip())
-                with open(log_file, 'a', encoding='utf-8') as f:
-                    f.write(stdout_line)
-            
-            # Process stderr
-            if stderr_line:
-                print_color(stderr_line.strip(), Colors.RED)
-                with open(log_file, 'a', encoding='utf-8') as f:
-                    f.write(f"[ERROR] {stderr_line}")
-            
-            # Check if process has completed
-            if process.poll() is not None and not stdout_line and not stderr_line:
-                break
-        
-        # Get any remaining output
-        stdout, stderr = process.communicate()
+        # Drain stdout and stderr on their own threads so neither pipe can fill
+        # up and stall Gradle while the other one is being read
+        output_queue = queue.Queue()
+        readers = [
+            threading.Thread(target=_drain_pipe, args=(process.stdout, 'stdout', output_queue), daemon=True),
+            threading.Thread(target=_drain_pipe, args=(process.stderr, 'stderr', output_queue), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
         
-        # Process remaining stdout
-        if stdout:
-            print(stdout.strip())
-            with open(log_file, 'a', encoding='utf-8') as f:
-                f.write(stdout)
+        # Stream output in real-time
+        open_streams = len(readers)
+        while open_streams:
+            stream, line = output_queue.get()
+            if line is None:
+                open_streams -= 1
+            elif stream == 'stdout':
+                print(line.strip())
+                log_fh.write(line)
+            else:
+                print_color(line.strip(), Colors.RED)
+                log_fh.write(f"[ERROR] {line}")
         
-        # Process remaining stderr
-        if stderr:
-            print_color("\n=== Gradle Errors ===", Colors.RED)
-            print_color(stderr.strip(), Colors.RED)
-            with open(log_file, 'a', encoding='utf-8') as f:
-                f.write("\n=== Errors ===\n" + stderr)
+        process.wait()
+        for reader in readers:
+            reader.join()
         
         return process.returncode
         
     except Exception as e:
         error_msg = f"❌ Error running Gradle: {e}"
         print_color(error_msg, Colors.RED)
-        with open(log_file, 'a', encoding='utf-8') as f:
-            f.write(f"\n{error_msg}\n")
+        log_fh.write(f"\n{error_msg}\n")
         return 1
+    finally:
+        log_fh.close()
 
 def parse_arguments():
     """Parse command line arguments."""
@@ -229,6 +239,8 @@ def parse_arguments():
                       help='Gradle task to run (default: build)')
     parser.add_argument('--no-clean', action='store_true',
                       help='Skip cleaning build directories')
+    parser.add_argument('--deep-clean', action='store_true',
+                      help='Also purge the project-local Gradle caches and build/bin/out directories')
     
     return parser.parse_args()
 
@@ -246,7 +258,7 @@ def main():
     if not args.no_clean:
         # Clean build directories
         print_color("\n=== Cleaning Build Directories ===", Colors.CYAN)
-        clean_success = clean_directories()
+        clean_success = clean_directories(deep_clean=args.deep_clean)
         if not clean_success:
             print_color("  ⚠️  Some cleanup steps had issues, but continuing with build...", Colors.YELLOW)
         else:
@@ -254,8 +266,9 @@ def main():
     else:
         print_color("\n=== Skipping Cleanup (--no-clean) ===", Colors.YELLOW)
     
-    # Prepare Gradle arguments
-    gradle_args = [args.task, '--no-daemon', '--info']
+    # Prepare Gradle arguments; clean and build run in one invocation
+    gradle_args = [] if args.no_clean else ['clean']
+    gradle_args += [args.task, '--info'] + GRADLE_PERFORMANCE_ARGS
     if args.stacktrace:
         gradle_args.append('--stacktrace')
     
@@ -7,6 +7,7 @@ import re
 import json
 import numpy as np
 from collections import defaultdict, Counter
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
 import logging
@@ -24,6 +25,65 @@ class ThemeType(str, Enum):
     PLOT_DRIVEN = "plot_driven"
     SETTING_DRIVEN = "setting_driven"
 
+# Score bonus per theme type, used when ranking candidate themes
+THEME_TYPE_BONUS = {
+    ThemeType.MAJOR: 0.3,
+    ThemeType.SYMBOLIC: 0.2,
+    ThemeType.CHARACTER_DRIVEN: 0.15,
+    ThemeType.PLOT_DRIVEN: 0.1,
+    ThemeType.SETTING_DRIVEN: 0.1,
+    ThemeType.MINOR: 0.0
+}
+
+# Text patterns, compiled once at import
+SENTENCE_BOUNDARY = re.compile(r'(?<=\w[.!?])\s+')
+WORD_PATTERN = re.compile(r'\b\w+\b')
+QUOTED_PHRASE_PATTERN = re.compile(r'"([^"]+)"')
+
+# Function words that are never themes on their own
+COMMON_WORDS = frozenset({
+    'the', 'and', 'but', 'or', 'if', 'then', 'because', 'when', 'where', 
+    'how', 'what', 'why', 'this', 'that', 'these', 'those', 'there', 'here',
+    'for', 'with', 'without', 'about', 'into', 'through', 'after', 'before',
+    'some', 'any', 'all', 'none', 'both', 'either', 'neither', 'each', 'every',
+    'very', 'quite', 'rather', 'somewhat', 'too', 'so', 'just', 'only', 'even'
+})
+
+# Boilerplate phrase shapes that never make meaningful themes
+COMMON_PHRASE_PATTERN = re.compile(
+    r'^(?:'
+    r'the \w+ of \w+'     # "the X of Y"
+    r'|in the \w+'         # "in the X"
+    r'|on the \w+'         # "on the X"
+    r'|at the \w+'         # "at the X"
+    r'|for the \w+'        # "for the X"
+    r'|with the \w+'       # "with the X"
+    r'|to be \w+'          # "to be X"
+    r'|it is \w+'          # "it is X"
+    r'|there is \w+'       # "there is X"
+    r'|there are \w+'      # "there are X"
+    r')$'
+)
+
+# Pronouns that mark a theme as character-driven
+CHARACTER_PRONOUNS = frozenset({'he', 'she', 'they', 'him', 'her', 'them'})
+
+# Keyword sets for theme classification, checked in priority order
+THEME_TYPE_KEYWORDS = (
+    # Action verbs
+    (ThemeType.PLOT_DRIVEN, frozenset({
+        'run', 'fight', 'discover', 'find', 'solve', 'escape', 'win', 'lose'
+    })),
+    # Setting-related terms
+    (ThemeType.SETTING_DRIVEN, frozenset({
+        'city', 'house', 'forest', 'mountain', 'ocean', 'world', 'land', 'place'
+    })),
+    # Abstract concepts
+    (ThemeType.SYMBOLIC, frozenset({
+        'love', 'death', 'time', 'freedom', 'justice', 'power', 'fear', 'hope'
+    })),
+)
+
 @dataclass
 class Theme:
     """Represents a theme in the text."""
@@ -66,7 +126,8 @@ class ThematicAnalyzer:
         min_theme_length: int = 1,
         max_theme_length: int = 3,
         min_theme_occurrences: int = 3,
-        theme_confidence_threshold: float = 0.7
+        theme_confidence_threshold: float = 0.7,
+        llm_concurrency: int = 5
     ):
         """Initialize the thematic analyzer.
         
@@ -76,12 +137,14 @@ class ThematicAnalyzer:
             max_theme_length: Maximum words in a theme phrase
             min_theme_occurrences: Minimum occurrences to consider a phrase a theme
             theme_confidence_threshold: Minimum confidence score for a theme
+            llm_concurrency: Maximum number of concurrent LLM enhancement requests
         """
         self.llm_service = llm_service
         self.min_theme_length = min_theme_length
         self.max_theme_length = max_theme_length
         self.min_theme_occurrences = min_theme_occurrences
         self.theme_confidence_threshold = theme_confidence_threshold
+        self.llm_concurrency = llm_concurrency
     
     def analyze_text(
         self,
@@ -135,7 +198,7 @@ class ThematicAnalyzer:
         sentence_count = 0
         
         # Simple sentence splitting (could be enhanced with NLP)
-        sentences = re.split(r'(?<=\w[.!?])\s+', text)
+        sentences = SENTENCE_BOUNDARY.split(text)
         
         for sentence in sentences:
             current_paragraph.append(sentence)
@@ -180,16 +243,16 @@ class ThematicAnalyzer:
         paragraph_themes = []
         
         for para in paragraphs:
-            words = re.findall(r'\b\w+\b', para['text'].lower())
+            words = WORD_PATTERN.findall(para['text'].lower())
             
-            # Extract n-grams of different lengths
+            # Extract n-grams of different lengths; Counter.update counts in C
             for n in range(self.min_theme_length, self.max_theme_length + 1):
-                for i in range(len(words) - n + 1):
-                    ngram = ' '.join(words[i:i+n])
-                    ngram_counter[ngram] += 1
+                ngram_counter.update(
+                    ' '.join(words[i:i+n]) for i in range(len(words) - n + 1)
+                )
             
             # Also look for phrases in quotes as potential themes
-            quoted_phrases = re.findall(r'"([^"]+)"', para['text'])
+            quoted_phrases = QUOTED_PHRASE_PATTERN.findall(para['text'])
             for phrase in quoted_phrases:
                 words_in_phrase = len(phrase.split())
                 if (words_in_phrase >= self.min_theme_length and 
@@ -250,7 +313,7 @@ class ThematicAnalyzer:
             for para_idx in data['paragraphs'][:3]:  # Limit to first 3 occurrences
                 para_text = paragraphs[para_idx]['text']
                 # Find the sentence containing the theme
-                sentences = re.split(r'(?<=\w[.!?])\s+', para_text)
+                sentences = SENTENCE_BOUNDARY.split(para_text)
                 for sent in sentences:
                     if theme_text.lower() in sent.lower():
                         theme.supporting_quotes.append({
@@ -285,15 +348,7 @@ class ThematicAnalyzer:
             score += distribution * 0.3  # 30% weight
         
         # 3. Theme type bonus
-        type_bonus = {
-            ThemeType.MAJOR: 0.3,
-            ThemeType.SYMBOLIC: 0.2,
-            ThemeType.CHARACTER_DRIVEN: 0.15,
-            ThemeType.PLOT_DRIVEN: 0.1,
-            ThemeType.SETTING_DRIVEN: 0.1,
-            ThemeType.MINOR: 0.0
-        }.get(theme_data['type'], 0.0)
-        score += type_bonus
+        score += THEME_TYPE_BONUS.get(theme_data['type'], 0.0)
         
         # 4. Length penalty (very short or very long themes are penalized)
         word_count = len(theme_text.split())
@@ -325,13 +380,23 @@ class ThematicAnalyzer:
                 'author': author or 'the author',
                 'top_themes': [theme.name for theme in themes[:5]],  # Only enhance top themes
                 'word_count': len(full_text.split()),
-                **metadata
+                **(metadata or {})
             }
             
-            # Generate enhanced descriptions and analysis
-            for theme in themes[:5]:  # Limit to top 5 themes for LLM analysis
-                prompt = self._build_theme_enhancement_prompt(theme, context)
-                response = self.llm_service.generate(prompt)
+            # Generate enhanced descriptions and analysis; the requests are
+            # independent, so issue them concurrently rather than one by one
+            top_themes = themes[:5]  # Limit to top 5 themes for LLM analysis
+            prompts = [self._build_theme_enhancement_prompt(theme, context) for theme in top_themes]
+            with ThreadPoolExecutor(max_workers=max(1, min(self.llm_concurrency, len(prompts)))) as executor:
+                futures = [executor.submit(self.llm_service.generate, prompt) for prompt in prompts]
+            
+            for theme, future in zip(top_themes, futures):
+                # A failed request only skips its own theme
+                try:
+                    response = future.result()
+                except Exception as e:
+                    logger.warning(f"LLM request failed for theme {theme.name}: {e}")
+                    continue
                 
                 # Parse response and update theme
                 try:
@@ -382,64 +447,31 @@ JSON Response:"""
         words = theme_text.split()
         
         # Check for character names or pronouns
-        if (any(word.istitle() for word in words) or 
-            any(word in ['he', 'she', 'they', 'him', 'her', 'them'] for word in words)):
+        if any(word.istitle() for word in words) or not CHARACTER_PRONOUNS.isdisjoint(words):
             return ThemeType.CHARACTER_DRIVEN
-            
-        # Check for action verbs (plot-driven)
-        action_verbs = {'run', 'fight', 'discover', 'find', 'solve', 'escape', 'win', 'lose'}
-        if any(word in action_verbs for word in words):
-            return ThemeType.PLOT_DRIVEN
-            
-        # Check for setting-related terms
-        setting_terms = {'city', 'house', 'forest', 'mountain', 'ocean', 'world', 'land', 'place'}
-        if any(word in setting_terms for word in words):
-            return ThemeType.SETTING_DRIVEN
-            
-        # Check for abstract concepts (symbolic)
-        abstract_terms = {'love', 'death', 'time', 'freedom', 'justice', 'power', 'fear', 'hope'}
-        if any(word in abstract_terms for word in words):
-            return ThemeType.SYMBOLIC
-            
+        
+        # Check plot, setting and symbolic keywords, in that order
+        for theme_type, keywords in THEME_TYPE_KEYWORDS:
+            if not keywords.isdisjoint(words):
+                return theme_type
+        
         # Default to minor theme
         return ThemeType.MINOR
     
     def _is_common_phrase(self, phrase: str) -> bool:
         """Check if a phrase is too common to be a meaningful theme."""
-        common_phrases = {
-            'the', 'and', 'but', 'or', 'if', 'then', 'because', 'when', 'where', 
-            'how', 'what', 'why', 'this', 'that', 'these', 'those', 'there', 'here',
-            'for', 'with', 'without', 'about', 'into', 'through', 'after', 'before',
-            'some', 'any', 'all', 'none', 'both', 'either', 'neither', 'each', 'every',
-            'very', 'quite', 'rather', 'somewhat', 'too', 'so', 'just', 'only', 'even'
-        }
-        
         words = phrase.lower().split()
         
         # Single-word phrases are usually too common
         if len(words) == 1:
-            return words[0] in common_phrases
+            return words[0] in COMMON_WORDS
             
         # Check if all words are common
-        if all(word in common_phrases for word in words):
+        if COMMON_WORDS.issuperset(words):
             return True
             
         # Check for common patterns
-        common_patterns = [
-            r'^the \w+ of \w+$',  # "the X of Y"
-            r'^in the \w+$',         # "in the X"
-            r'^on the \w+$',         # "on the X"
-            r'^at the \w+$',         # "at the X"
-            r'^for the \w+$',        # "for the X"
-            r'^with the \w+$',       # "with the X"
-            r'^to be \w+$',          # "to be X"
-            r'^it is \w+$',          # "it is X"
-            r'^there is \w+$',       # "there is X"
-            r'^there are \w+$'       # "there are X"
-        ]
-        
-        phrase_lower = phrase.lower()
-        return any(re.match(pattern, phrase_lower) for pattern in common_patterns)
+        return COMMON_PHRASE_PATTERN.match(phrase.lower()) is not None
 
 # Example usage
 if __name__ == "__main__":
@@ -6,6 +6,7 @@ This module provides a high-level interface for document processing, retrieval,
 import os
 import json
 import logging
+import orjson
 from typing import Dict, List, Any, Optional, Union
 from pathlib import Path
 from dataclasses import dataclass, asdict
@@ -21,14 +22,15 @@ logger = logging.getLogger(__name__)
 # Import local modules
 try:
     from processing.document_processor import DocumentProcessor
-    from retrieval.vector_store import VectorStore
+    from retrieval.vector_store import ModelEmbeddingFunction, VectorStore
     from retrieval.retriever import Retriever
+    from retrieval.semantic_cache import SemanticCache
     from analysis.thematic_analyzer import ThematicAnalyzer, Theme, ThemeType
 except ImportError as e:
     logger.error(f"Failed to import required modules: {e}")
     raise
 
-@dataclass
+@dataclass(frozen=True)
 class RAGConfig:
     """Configuration for the RAG service."""
     # Document processing
@@ -39,11 +41,19 @@ class RAGConfig:
     persist_directory: str = "./chroma_db"
     embedding_model: str = "all-MiniLM-L6-v2"
     collection_name: str = "komga_documents"
+    hnsw_m: int = 16
+    hnsw_construction_ef: int = 200
+    hnsw_search_ef: int = 100
+    add_batch_size: int = 500
     
     # Retrieval
     retrieval_top_k: int = 5
     use_reranking: bool = True
     rerank_top_k: int = 3
+    score_threshold: Optional[float] = None
+    use_semantic_cache: bool = True
+    semantic_cache_size: int = 1000
+    semantic_cache_threshold: float = 0.95
     
     # Thematic analysis
     min_theme_occurrences: int = 3
@@ -90,11 +100,19 @@ class RAGService:
             model_name=self.config.embedding_model
         )
         
-        # Vector store
+        # Vector store (shares the processor's embedding model)
         self.vector_store = VectorStore(
             persist_directory=self.config.persist_directory,
             embedding_model=self.config.embedding_model,
-            collection_name=self.config.collection_name
+            collection_name=self.config.collection_name,
+            hnsw_m=self.config.hnsw_m,
+            hnsw_construction_ef=self.config.hnsw_construction_ef,
+            hnsw_search_ef=self.config.hnsw_search_ef,
+            embedding_function=ModelEmbeddingFunction(
+                self.document_processor.embedding_model
+            ),
+            # Chunks are embedded by the same model, so store their vectors as-is
+            use_precomputed_embeddings=True
         )
         
         # Retriever
@@ -102,7 +120,12 @@ class RAGService:
             vector_store=self.vector_store,
             use_reranking=self.config.use_reranking,
             retrieval_top_k=self.config.retrieval_top_k,
-            rerank_top_k=self.config.rerank_top_k
+            rerank_top_k=self.config.rerank_top_k,
+            score_threshold=self.config.score_threshold,
+            semantic_cache=SemanticCache(
+                max_size=self.config.semantic_cache_size,
+                similarity_threshold=self.config.semantic_cache_threshold
+            ) if self.config.use_semantic_cache and self.config.semantic_cache_size > 0 else None
         )
         
         # Thematic analyzer
@@ -131,18 +154,20 @@ class RAGService:
             Dictionary with processing results
         """
         file_path = Path(file_path)
-        if not file_path.exists():
+        try:
+            file_stat = file_path.stat()
+        except FileNotFoundError:
             raise FileNotFoundError(f"File not found: {file_path}")
         
         # Generate cache key
-        cache_key = self._generate_cache_key(file_path, metadata)
+        cache_key = self._generate_cache_key(file_path, metadata, file_stat)
         cache_file = Path(self.config.cache_dir) / f"{cache_key}.json"
         
         # Check cache
         if not force_reprocess and self.config.use_cache and cache_file.exists():
             logger.info(f"Loading from cache: {cache_file}")
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(cache_file, 'rb') as f:
+                return orjson.loads(f.read())
         
         # Process document
         logger.info(f"Processing document: {file_path}")
@@ -152,13 +177,20 @@ class RAGService:
         )
         
         # Add to vector store
-        doc_ids = self.vector_store.add_documents(result['chunks'])
+        doc_ids = self.vector_store.add_documents(
+            result['chunks'],
+            batch_size=self.config.add_batch_size
+        )
         result['document_ids'] = doc_ids
+        if doc_ids:
+            self.retriever.clear_cache()
         
-        # Save to cache
+        # Save to cache; serialize before opening the file so a failure
+        # can't leave a truncated cache entry behind
         if self.config.use_cache:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
+            data = orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS, default=str)
+            with open(cache_file, 'wb') as f:
+                f.write(data)
         
         return result
     
@@ -279,11 +311,13 @@ class RAGService:
     def _generate_cache_key(
         self, 
         file_path: Union[str, Path], 
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        file_stat: Optional[os.stat_result] = None
     ) -> str:
         """Generate a cache key for a document."""
         file_path = Path(file_path)
-        file_stat = file_path.stat()
+        if file_stat is None:
+            file_stat = file_path.stat()
         
         # Create a unique key based on file properties and metadata
         key_parts = [
@@ -362,11 +396,16 @@ Answer:"""
     
     def delete_document(self, document_id: str) -> bool:
         """Delete a document from the vector store."""
-        return self.vector_store.delete_documents([document_id])
+        deleted = self.vector_store.delete_documents([document_id])
+        if deleted:
+            self.retriever.clear_cache()
+        return deleted
     
     def reset_vector_store(self) -> bool:
         """Clear all documents from the vector store."""
-        return self.vector_store.clear_collection()
+        cleared = self.vector_store.clear_collection()
+        self.retriever.clear_cache()
+        return cleared
 
 # Example usage
 if __name__ == "__main__":
@@ -9,6 +9,7 @@ It initializes the FastAPI application and starts the server.
 import uvicorn
 import logging
 import argparse
+import os
 from pathlib import Path
 from typing import Optional
 
@@ -32,8 +33,11 @@ def parse_args():
                       help="Host to bind the server to")
     parser.add_argument("--port", type=int, default=8000,
                       help="Port to bind the server to")
-    parser.add_argument("--workers", type=int, default=1,
-                      help="Number of worker processes")
+    # One worker by default: each worker opens its own Chroma client on the
+    # same persist directory and keeps its own semantic cache
+    parser.add_argument("--workers", type=int,
+                      default=int(os.getenv("WEB_CONCURRENCY", 1)),
+                      help="Number of worker processes (default: $WEB_CONCURRENCY or 1)")
     
     # Configuration
     parser.add_argument("--config", type=str, default="config.yaml",
@@ -61,13 +65,15 @@ def main():
     logger.info(f"Starting Komga RAG service on {args.host}:{args.port}")
     logger.info(f"Debug mode: {'ON' if args.debug else 'OFF'}")
     logger.info(f"Auto-reload: {'ON' if args.reload else 'OFF'}")
+    if not args.reload:
+        logger.info(f"Workers: {args.workers}")
     
     # Start the server
     uvicorn.run(
         "rag.api:app",
         host=args.host,
         port=args.port,
-        workers=args.workers,
+        workers=1 if args.reload else args.workers,
         reload=args.reload,
         log_level="debug" if args.debug else "info",
         factory=True
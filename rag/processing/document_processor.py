@@ -7,13 +7,18 @@ document formats for the Retrieval-Augmented Generation (RAG) system.
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import multiprocessing
 import os
 import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union, TypedDict, Literal
+from typing import Any, Dict, Iterator, List, Optional, Union, TypedDict, Literal
 
 import spacy
 from sentence_transformers import SentenceTransformer
@@ -26,6 +31,42 @@ DocumentChunk = Dict[str, Any]
 DocumentMetadata = Dict[str, Any]
 FileContent = Union[str, bytes]  # Could be text content or binary data
 
+# Blank lines separate paragraphs; sentences never span them
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+# Paragraphs parsed per spaCy batch while chunking
+SPACY_BATCH_SIZE = 64
+
+# Pages are joined as separate paragraphs so chunking can stream them
+PDF_PAGE_SEPARATOR = '\n\n'
+
+# Minimum number of pages per worker process before PDF extraction is parallelized
+PDF_PAGES_PER_WORKER = 25
+
+# spaCy components not needed for sentence segmentation; skipping them makes
+# both loading and running the pipeline cheaper
+SPACY_UNUSED_COMPONENTS = ('ner', 'lemmatizer')
+
+@lru_cache(maxsize=None)
+def load_spacy_model(
+    name: str = 'en_core_web_sm',
+    exclude: tuple = SPACY_UNUSED_COMPONENTS
+) -> spacy.language.Language:
+    """Load a spaCy pipeline once per process and share it between processors."""
+    return spacy.load(name, exclude=list(exclude))
+
+def _pdf_worker_context() -> multiprocessing.context.BaseContext:
+    """Start method for PDF extraction workers.
+    
+    Workers must not fork this process, which may hold torch threads or a CUDA
+    context. 'forkserver' starts them from a clean server process and is
+    cheap per worker; 'spawn' is the fallback where it isn't available
+    (Windows).
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
 class ProcessingResult(TypedDict):
     """Typed dictionary representing the result of document processing."""
     chunks: List[DocumentChunk]
@@ -40,20 +81,44 @@ class DocumentProcessor:
     chunking of the extracted text, and generation of embeddings for each chunk.
     """
     
-    def __init__(self, model_name: str = 'all-mpnet-base-v2') -> None:
+    def __init__(
+        self,
+        model_name: str = 'all-mpnet-base-v2',
+        device: Optional[str] = None,
+        use_fp16: bool = True,
+        embedding_batch_size: int = 32,
+        embedding_cache_size: int = 10_000
+    ) -> None:
         """Initialize the document processor.
         
         Args:
             model_name: Name of the sentence transformer model to use for embeddings.
                       Defaults to 'all-mpnet-base-v2'.
+            device: Device to run the embedding model on ('cpu', 'cuda', ...).
+                  Defaults to CUDA when available.
+            use_fp16: Run the embedding model in half precision when it is on a
+                    CUDA device. Ignored on CPU.
+            embedding_batch_size: Number of chunks encoded per model forward pass.
+            embedding_cache_size: Number of chunk embeddings kept in memory, keyed
+                                by content, so repeated texts are not re-encoded.
         
         Raises:
             OSError: If the required models cannot be loaded.
         """
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_cache_size = embedding_cache_size
+        self._embedding_cache: OrderedDict[bytes, Any] = OrderedDict()
+        
         try:
-            self.nlp = spacy.load('en_core_web_sm')
-            self.embedding_model = SentenceTransformer(model_name)
-            logger.info(f"Initialized DocumentProcessor with model: {model_name}")
+            self.nlp = load_spacy_model('en_core_web_sm')
+            self.embedding_model = SentenceTransformer(model_name, device=device)
+            if use_fp16 and self.embedding_model.device.type == 'cuda':
+                # Half-precision weights use tensor-core kernels and halve memory traffic
+                self.embedding_model.half()
+            logger.info(
+                f"Initialized DocumentProcessor with model: {model_name} "
+                f"on {self.embedding_model.device}"
+            )
         except Exception as e:
             logger.error(f"Failed to initialize DocumentProcessor: {e}")
             raise
@@ -79,14 +144,16 @@ class DocumentProcessor:
         start_time = datetime.utcnow()
         file_path = Path(file_path)
         
-        if not file_path.exists():
+        try:
+            file_stat = file_path.stat()
+        except FileNotFoundError:
             error_msg = f"File not found: {file_path}"
             logger.error(error_msg)
             raise FileNotFoundError(error_msg)
             
         try:
             # Extract basic file metadata
-            file_meta = self._get_file_metadata(file_path)
+            file_meta = self._get_file_metadata(file_path, file_stat)
             logger.info(f"Processing document: {file_path.name} (ID: {file_meta.get('file_id')})")
             
             # Extract content based on file type
@@ -105,31 +172,29 @@ class DocumentProcessor:
                     'status': 'partial'
                 }
             
-            # Generate embeddings for each chunk
+            # Generate embeddings for all chunks in batches
+            embeddings = self._encode_chunks([chunk['text'] for chunk in chunks])
+            
             processed_chunks: List[DocumentChunk] = []
-            for i, chunk in enumerate(chunks):
-                try:
-                    # Generate embedding for the chunk
-                    embedding = self.embedding_model.encode(chunk['text'])
-                    
-                    # Create chunk metadata
-                    chunk_metadata = {
-                        **chunk.get('metadata', {}),
-                        'chunk_id': f"{file_meta['file_id']}_chunk_{i}",
-                        'position': i,
-                        'total_chunks': len(chunks),
-                        **file_meta,
-                        **(metadata or {})
-                    }
-                    
-                    processed_chunks.append({
-                        'text': chunk['text'],
-                        'embedding': embedding.tolist(),
-                        'metadata': chunk_metadata
-                    })
-                    
-                except Exception as e:
-                    logger.error(f"Error processing chunk {i} of {file_path}: {e}", exc_info=True)
+            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+                if embedding is None:
+                    continue
+                
+                # Create chunk metadata
+                chunk_metadata = {
+                    **chunk.get('metadata', {}),
+                    'chunk_id': f"{file_meta['file_id']}_chunk_{i}",
+                    'position': i,
+                    'total_chunks': len(chunks),
+                    **file_meta,
+                    **(metadata or {})
+                }
+                
+                processed_chunks.append({
+                    'text': chunk['text'],
+                    'embedding': embedding.tolist(),
+                    'metadata': chunk_metadata
+                })
             
             processing_time = (datetime.utcnow() - start_time).total_seconds()
             logger.info(f"Processed {len(processed_chunks)} chunks from {file_path} in {processing_time:.2f}s")
@@ -151,10 +216,80 @@ class DocumentProcessor:
                 'error': str(e)
             }
     
-    def _get_file_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Extract basic file metadata."""
+    def _encode_chunks(self, texts: List[str]) -> List[Optional[Any]]:
+        """Embed chunk texts, reusing embeddings of previously seen texts.
+        
+        Texts are keyed by a BLAKE2b digest of their content, so identical
+        chunks (re-ingested files, repeated boilerplate) are only encoded once.
+        """
+        keys = [
+            hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+            for text in texts
+        ]
+        
+        # Encode each distinct uncached text once
+        misses: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in self._embedding_cache and key not in misses:
+                misses[key] = text
+        
+        encoded = dict(zip(misses, self._encode_texts(list(misses.values())))) if misses else {}
+        
+        embeddings: List[Optional[Any]] = []
+        for key in keys:
+            if key in encoded:
+                embedding = encoded[key]
+                if embedding is not None:
+                    self._embedding_cache[key] = embedding
+            else:
+                embedding = self._embedding_cache[key]
+                self._embedding_cache.move_to_end(key)
+            embeddings.append(embedding)
+        
+        # Evict least recently used entries only after this document is assembled
+        while len(self._embedding_cache) > self.embedding_cache_size:
+            self._embedding_cache.popitem(last=False)
+        
+        return embeddings
+    
+    def _encode_texts(self, texts: List[str]) -> List[Optional[Any]]:
+        """Embed texts in batches.
+        
+        Falls back to encoding one chunk at a time if the batched call fails
+        (e.g. GPU out of memory); chunks that still fail map to None.
+        """
+        try:
+            return list(self.embedding_model.encode(
+                texts,
+                batch_size=self.embedding_batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            ))
+        except Exception as e:
+            logger.warning(f"Batched embedding failed, retrying chunk by chunk: {e}")
+        
+        embeddings: List[Optional[Any]] = []
+        for i, text in enumerate(texts):
+            try:
+                embeddings.append(self.embedding_model.encode(
+                    text,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True
+                ))
+            except Exception as e:
+                logger.error(f"Error embedding chunk {i}: {e}", exc_info=True)
+                embeddings.append(None)
+        return embeddings
+    
+    def _get_file_metadata(
+        self,
+        file_path: str,
+        stat: Optional[os.stat_result] = None
+    ) -> Dict[str, Any]:
+        """Extract basic file metadata, reusing ``stat`` if already taken."""
         path = Path(file_path)
-        stat = path.stat()
+        if stat is None:
+            stat = path.stat()
         
         return {
             'file_id': f"file_{stat.st_ino}",
@@ -187,15 +322,11 @@ class DocumentProcessor:
         if not content.strip():
             return []
             
-        # Split into sentences first
-        doc = self.nlp(content)
-        sentences = [sent.text for sent in doc.sents]
-        
         chunks = []
         current_chunk = []
         current_length = 0
         
-        for sentence in sentences:
+        for sentence in self._iter_sentences(content):
             sentence_length = len(sentence.split())
             
             # If adding this sentence would exceed chunk size, finalize current chunk
@@ -228,17 +359,65 @@ class DocumentProcessor:
             
         return chunks
     
+    def _iter_sentences(self, content: str) -> Iterator[str]:
+        """Yield sentences lazily, parsing the content paragraph by paragraph.
+        
+        Streaming paragraphs through ``nlp.pipe`` keeps only one batch of
+        parsed text in memory instead of a Doc for the whole document, and
+        keeps long books under spaCy's ``max_length`` limit.
+        """
+        for doc in self.nlp.pipe(self._iter_paragraphs(content), batch_size=SPACY_BATCH_SIZE):
+            for sent in doc.sents:
+                yield sent.text
+    
+    def _iter_paragraphs(self, content: str) -> Iterator[str]:
+        """Yield non-empty paragraphs, splitting any longer than ``nlp.max_length``.
+        
+        Oversized paragraphs are cut at the last line break (or space) before
+        the limit, so text without blank lines still reaches spaCy in pieces.
+        """
+        max_length = self.nlp.max_length
+        for paragraph in PARAGRAPH_BREAK.split(content):
+            while len(paragraph) > max_length:
+                cut = paragraph.rfind('\n', 0, max_length)
+                if cut <= 0:
+                    cut = paragraph.rfind(' ', 0, max_length)
+                if cut <= 0:
+                    cut = max_length
+                if paragraph[:cut].strip():
+                    yield paragraph[:cut]
+                paragraph = paragraph[cut:]
+            if paragraph.strip():
+                yield paragraph
+    
     def _extract_pdf(self, file_path: str) -> str:
-        """Extract text from PDF files."""
+        """Extract text from PDF files.
+        
+        Large PDFs are split into page ranges that are extracted in parallel
+        worker processes; page order is preserved.
+        """
         try:
             import PyPDF2
+            from .pdf_pages import extract_page_range, extract_pdf_pages
             
-            text = []
             with open(file_path, 'rb') as file:
                 reader = PyPDF2.PdfReader(file)
-                for page in reader.pages:
-                    text.append(page.extract_text() or '')
-            return '\n'.join(text)
+                page_count = len(reader.pages)
+                
+                workers = min(os.cpu_count() or 1, page_count // PDF_PAGES_PER_WORKER)
+                if workers <= 1:
+                    return PDF_PAGE_SEPARATOR.join(extract_page_range(reader, 0, page_count))
+            
+            step = -(-page_count // workers)  # ceil division
+            ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_pdf_worker_context()) as executor:
+                parts = executor.map(
+                    extract_pdf_pages,
+                    [file_path] * len(ranges),
+                    [start for start, _ in ranges],
+                    [stop for _, stop in ranges]
+                )
+                return PDF_PAGE_SEPARATOR.join(text for part in parts for text in part)
             
         except ImportError:
             raise ImportError("PyPDF2 is required for PDF extraction. Install with: pip install pypdf2")
@@ -0,0 +1,22 @@
+"""
+PDF page text extraction.
+
+Kept apart from document_processor so that worker processes extracting pages
+in parallel only need to import PyPDF2, not spaCy or the embedding model.
+"""
+
+from typing import List
+
+import PyPDF2
+
+def extract_page_range(reader: PyPDF2.PdfReader, start: int, stop: int) -> List[str]:
+    """Extract the text of pages ``start``..``stop - 1`` from an open reader."""
+    return [reader.pages[i].extract_text() or '' for i in range(start, stop)]
+
+def extract_pdf_pages(file_path: str, start: int, stop: int) -> List[str]:
+    """Open a PDF and extract the text of pages ``start``..``stop - 1``.
+    
+    Runs in worker processes, so it takes a path rather than a reader.
+    """
+    with open(file_path, 'rb') as file:
+        return extract_page_range(PyPDF2.PdfReader(file), start, stop)
@@ -4,9 +4,11 @@ Handles query processing, retrieval, and ranking of documents.
 """
 
 from typing import List, Dict, Any, Optional, Union
+from functools import lru_cache
 import numpy as np
 from sentence_transformers import CrossEncoder
 from .vector_store import VectorStore
+from .semantic_cache import SemanticCache
 import logging
 import json
 
@@ -14,6 +16,11 @@ import json
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=None)
+def load_cross_encoder(model_name: str) -> CrossEncoder:
+    """Load a cross-encoder once per process and share it between retrievers."""
+    return CrossEncoder(model_name)
+
 class Retriever:
     def __init__(
         self, 
@@ -21,7 +28,9 @@ class Retriever:
         cross_encoder_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
         use_reranking: bool = True,
         retrieval_top_k: int = 50,
-        rerank_top_k: int = 5
+        rerank_top_k: int = 5,
+        semantic_cache: Optional[SemanticCache] = None,
+        score_threshold: Optional[float] = None
     ):
         """Initialize the retriever with a vector store and optional reranker.
         
@@ -31,17 +40,23 @@ class Retriever:
             use_reranking: Whether to use cross-encoder for reranking
             retrieval_top_k: Number of documents to retrieve before reranking
             rerank_top_k: Number of documents to return after reranking
+            semantic_cache: Optional cache returning earlier results for
+                near-identical queries
+            score_threshold: Optional minimum vector similarity; weaker
+                first-stage matches are dropped before reranking
         """
         self.vector_store = vector_store
+        self.semantic_cache = semantic_cache
         self.use_reranking = use_reranking
         self.retrieval_top_k = retrieval_top_k
         self.rerank_top_k = rerank_top_k
+        self.score_threshold = score_threshold
         
         # Initialize cross-encoder for reranking if enabled
         self.cross_encoder = None
         if use_reranking:
             try:
-                self.cross_encoder = CrossEncoder(cross_encoder_model)
+                self.cross_encoder = load_cross_encoder(cross_encoder_model)
             except Exception as e:
                 logger.warning(f"Failed to load cross-encoder: {e}. Falling back to vector similarity.")
                 self.use_reranking = False
@@ -66,24 +81,99 @@ class Retriever:
         """
         # Step 1: Query expansion (optional)
         expanded_query = self._expand_query(query) if expand_query else query
+        try:
+            query_embedding = self.vector_store.embed_query(expanded_query)
+        except Exception as e:
+            logger.error(f"Error embedding query: {e}")
+            return []
+        
+        # Serve near-duplicate queries with the same parameters from the cache
+        cache_key = self._cache_key(n_results, filter_metadata)
+        cached = self._lookup_cache(query_embedding, cache_key)
+        if cached is not None:
+            return cached
         
         # Step 2: First-stage retrieval (vector similarity)
         results = self.vector_store.search(
             query=expanded_query,
             n_results=self.retrieval_top_k,
             filter_metadata=filter_metadata,
-            include=["documents", "metadatas", "distances", "embeddings"]
+            include=["documents", "metadatas", "distances", "embeddings"],
+            query_embedding=query_embedding
         )
         
+        return self._rank_results(query, query_embedding, results, n_results, cache_key)
+    
+    def _cache_key(
+        self,
+        n_results: int,
+        filter_metadata: Optional[Dict[str, Any]]
+    ) -> Optional[tuple]:
+        """Build the semantic cache key for a set of search parameters."""
+        if self.semantic_cache is None:
+            return None
+        return (n_results, json.dumps(filter_metadata, sort_keys=True, default=str))
+    
+    def _lookup_cache(
+        self,
+        query_embedding: List[float],
+        cache_key: Optional[tuple]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results for the query, with embeddings as lists again."""
+        if self.semantic_cache is None:
+            return None
+        cached = self.semantic_cache.lookup(query_embedding, key=cache_key)
+        if cached is None:
+            return None
+        return [
+            {**result, 'embedding': result['embedding'].tolist()}
+            if result.get('embedding') is not None else dict(result)
+            for result in cached
+        ]
+    
+    def _rank_results(
+        self,
+        query: str,
+        query_embedding: List[float],
+        results: Dict[str, List],
+        n_results: int,
+        cache_key: Optional[tuple]
+    ) -> List[Dict[str, Any]]:
+        """Rerank or format first-stage results and store them in the cache."""
         if not results['documents']:
             return []
         
+        # Re-ingested documents can leave identical chunks under several ids;
+        # drop them so the cross-encoder only scores each text once
+        results = self._dedupe_results(results)
+        
+        if self.score_threshold is not None:
+            results = self._filter_by_score(results)
+            if not results['documents']:
+                return []
+        
         # Step 3: Rerank with cross-encoder if enabled
         if self.use_reranking and self.cross_encoder:
-            return self._rerank_with_cross_encoder(query, results, n_results)
+            ranked = self._rerank_with_cross_encoder(query, results, n_results)
+        else:
+            # If no reranking, just return top N results
+            ranked = self._format_results(results, n_results)
         
-        # If no reranking, just return top N results
-        return self._format_results(results, n_results)
+        if self.semantic_cache is not None:
+            # Keep embeddings as packed float32 arrays rather than lists of
+            # boxed floats; they are converted back on a cache hit
+            self.semantic_cache.put(query_embedding, [
+                {**result, 'embedding': np.asarray(result['embedding'], dtype=np.float32)}
+                if result.get('embedding') is not None else result
+                for result in ranked
+            ], key=cache_key)
+        
+        return ranked
+    
+    def clear_cache(self) -> None:
+        """Invalidate cached results, e.g. after the vector store changed."""
+        if self.semantic_cache is not None:
+            self.semantic_cache.clear()
     
     def _expand_query(self, query: str) -> str:
         """Expand the query with similar terms or related concepts."""
@@ -98,6 +188,37 @@ class Retriever:
         
         return query
     
+    def _dedupe_results(self, results: Dict[str, List]) -> Dict[str, List]:
+        """Drop results whose text was already seen, keeping the closest match."""
+        seen = set()
+        keep = []
+        for i, doc in enumerate(results['documents']):
+            if doc not in seen:
+                seen.add(doc)
+                keep.append(i)
+        
+        return self._select_results(results, keep)
+    
+    def _filter_by_score(self, results: Dict[str, List]) -> Dict[str, List]:
+        """Drop results whose vector similarity is below ``score_threshold``."""
+        # Cosine distance -> similarity, compared in one vectorized pass
+        similarities = 1.0 - np.asarray(results['distances'], dtype=np.float64) / 2.0
+        return self._select_results(
+            results, np.flatnonzero(similarities >= self.score_threshold)
+        )
+    
+    @staticmethod
+    def _select_results(results: Dict[str, List], keep) -> Dict[str, List]:
+        """Keep only the result rows at the given (ascending) indices."""
+        size = len(results['documents'])
+        if len(keep) == size:
+            return results
+        
+        return {
+            field: [values[i] for i in keep] if len(values) == size else values
+            for field, values in results.items()
+        }
+    
     def _rerank_with_cross_encoder(
         self, 
         query: str, 
@@ -112,30 +233,37 @@ class Retriever:
         pairs = [(query, doc) for doc in results['documents']]
         
         # Get scores from cross-encoder
-        scores = self.cross_encoder.predict(pairs)
+        ce_scores = np.asarray(self.cross_encoder.predict(pairs), dtype=np.float64)
         
-        # Combine with original results
-        scored_results = []
-        for i, (doc, metadata, distance, embedding) in enumerate(zip(
-            results['documents'],
-            results['metadatas'],
-            results['distances'],
-            results['embeddings']
-        )):
-            scored_results.append({
-                'text': doc,
-                'metadata': metadata,
-                'vector_score': float(1.0 - (distance / 2.0)),  # Convert cosine distance to similarity
-                'cross_encoder_score': float(scores[i]),
-                'combined_score': float((1.0 - (distance / 2.0)) * 0.4 + scores[i] * 0.6),
-                'embedding': embedding
-            })
+        # Combine with vector similarity (cosine distance -> similarity) in one pass
+        vector_scores = 1.0 - np.asarray(results['distances'], dtype=np.float64) / 2.0
+        combined_scores = vector_scores * 0.4 + ce_scores * 0.6
         
-        # Sort by combined score
-        scored_results.sort(key=lambda x: x['combined_score'], reverse=True)
+        # Partial selection of the top N, then order just those. Ties keep
+        # first-stage order, both at the cut-off and within the selection.
+        n_results = min(n_results, len(combined_scores))
+        if n_results <= 0:
+            return []
+        cutoff = -np.partition(-combined_scores, n_results - 1)[n_results - 1]
+        above = np.flatnonzero(combined_scores > cutoff)
+        tied = np.flatnonzero(combined_scores == cutoff)[:n_results - len(above)]
+        top = np.concatenate([above, tied])
+        top = top[np.argsort(-combined_scores[top], kind='stable')]
         
-        # Return top N results
-        return scored_results[:n_results]
+        embeddings = results.get('embeddings')
+        if embeddings is None:
+            embeddings = [None] * len(results['documents'])
+        return [
+            {
+                'text': results['documents'][i],
+                'metadata': results['metadatas'][i],
+                'vector_score': float(vector_scores[i]),
+                'cross_encoder_score': float(ce_scores[i]),
+                'combined_score': float(combined_scores[i]),
+                'embedding': embeddings[i]
+            }
+            for i in top
+        ]
     
     def _format_results(
         self, 
@@ -169,14 +297,41 @@ class Retriever:
         n_results: int = 5, 
         filter_metadata: Optional[Dict[str, Any]] = None
     ) -> Dict[str, List[Dict[str, Any]]]:
-        """Retrieve documents for multiple queries in batch."""
+        """Retrieve documents for multiple queries in batch.
+        
+        All queries are embedded in one model call and searched with a single
+        vector store query; only reranking runs per query.
+        """
+        unique_queries = list(dict.fromkeys(queries))
+        try:
+            query_embeddings = self.vector_store.embed_queries(
+                [self._expand_query(query) for query in unique_queries]
+            )
+        except Exception as e:
+            logger.error(f"Error embedding queries: {e}")
+            return {query: [] for query in unique_queries}
+        cache_key = self._cache_key(n_results, filter_metadata)
+        
         results = {}
-        for query in queries:
-            results[query] = self.retrieve(
-                query=query,
-                n_results=n_results,
-                filter_metadata=filter_metadata
+        pending = []
+        for query, query_embedding in zip(unique_queries, query_embeddings):
+            cached = self._lookup_cache(query_embedding, cache_key)
+            if cached is not None:
+                results[query] = cached
+            else:
+                pending.append((query, query_embedding))
+        
+        search_results = self.vector_store.search_batch(
+            [query_embedding for _, query_embedding in pending],
+            n_results=self.retrieval_top_k,
+            filter_metadata=filter_metadata,
+            include=["documents", "metadatas", "distances", "embeddings"]
+        )
+        for (query, query_embedding), query_results in zip(pending, search_results):
+            results[query] = self._rank_results(
+                query, query_embedding, query_results, n_results, cache_key
             )
+        
         return results
     
     def get_similar_documents(
@@ -192,7 +347,7 @@ class Retriever:
         
         # Search by embedding
         results = self.vector_store.search(
-            query_embeddings=[doc['embedding']],
+            query_embedding=doc['embedding'],
             n_results=n_results + 1,  # +1 because the document itself will be in results
             include=["documents", "metadatas", "distances"]
         )
@@ -0,0 +1,118 @@
+"""
+Semantic cache for retrieval results.
+Returns previously computed results for queries whose embeddings are close
+enough to an earlier query, skipping the vector search entirely.
+"""
+
+from typing import Any, Hashable, List, Optional
+import threading
+import numpy as np
+
+class SemanticCache:
+    def __init__(
+        self,
+        max_size: int = 10_000,
+        similarity_threshold: float = 0.95
+    ):
+        """Initialize an empty semantic cache.
+
+        Args:
+            max_size: Maximum number of cached queries; the least recently
+                used entry is evicted when full; must be at least 1
+            similarity_threshold: Minimum cosine similarity between a new
+                query and a cached one to count as a hit
+        
+        Raises:
+            ValueError: If max_size is less than 1
+        """
+        if max_size < 1:
+            raise ValueError(f"max_size must be at least 1, got {max_size}")
+        
+        self.max_size = max_size
+        self.similarity_threshold = similarity_threshold
+
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None  # (max_size, dim), L2-normalized
+        self._last_used = np.zeros(max_size, dtype=np.int64)
+        self._keys: List[Hashable] = []
+        self._values: List[Any] = []
+        self._clock = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @staticmethod
+    def _normalize(vector: Any) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, vector: Any, key: Hashable = None) -> Optional[Any]:
+        """Return the cached value for the most similar query, if any.
+
+        Args:
+            vector: Query embedding
+            key: Extra lookup key (e.g. search parameters) that must match
+                exactly for an entry to be considered
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        with self._lock:
+            size = len(self._values)
+            if not size:
+                return None
+
+            query = self._normalize(vector)
+            if query.shape[0] != self._vectors.shape[1]:
+                return None
+
+            similarities = self._vectors[:size] @ query
+            candidates = np.flatnonzero(similarities >= self.similarity_threshold)
+
+            # Best match first; only candidates above the threshold are sorted
+            for index in candidates[np.argsort(-similarities[candidates])]:
+                if self._keys[index] == key:
+                    self._clock += 1
+                    self._last_used[index] = self._clock
+                    return self._values[index]
+
+            return None
+
+    def put(self, vector: Any, value: Any, key: Hashable = None) -> None:
+        """Store a value for a query embedding.
+
+        Args:
+            vector: Query embedding
+            value: Value to return for similar queries
+            key: Extra lookup key that must match on lookup
+        """
+        with self._lock:
+            query = self._normalize(vector)
+            if self._vectors is None or query.shape[0] != self._vectors.shape[1]:
+                # First entry (or embedding model changed): (re)allocate storage
+                self._vectors = np.zeros((self.max_size, query.shape[0]), dtype=np.float32)
+                self._keys.clear()
+                self._values.clear()
+
+            size = len(self._values)
+            if size < self.max_size:
+                index = size
+                self._keys.append(key)
+                self._values.append(value)
+            else:
+                index = int(np.argmin(self._last_used))
+                self._keys[index] = key
+                self._values[index] = value
+
+            self._vectors[index] = query
+            self._clock += 1
+            self._last_used[index] = self._clock
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._vectors = None
+            self._last_used[:] = 0
+            self._keys.clear()
+            self._values.clear()
@@ -3,7 +3,8 @@ Vector store implementation for efficient similarity search.
 Uses ChromaDB as the underlying vector database.
 """
 
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Tuple, Union
+from functools import lru_cache
 import numpy as np
 import chromadb
 from chromadb.config import Settings
@@ -17,12 +18,51 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=None)
+def get_client(persist_directory: str):
+    """Return the Chroma client for a persist directory, creating it once.
+    
+    Opening a client loads the persisted index from disk, and several clients
+    on the same directory would overwrite each other's data when persisting.
+    """
+    return chromadb.Client(
+        Settings(
+            chroma_db_impl="duckdb+parquet",
+            persist_directory=persist_directory,
+            anonymized_telemetry=False
+        )
+    )
+
+class ModelEmbeddingFunction:
+    """Chroma embedding function backed by an already loaded encoder.
+    
+    Lets the vector store reuse a model instance (e.g. the one owned by the
+    DocumentProcessor) instead of loading a second copy of the same weights.
+    """
+    
+    def __init__(self, model: Any):
+        """Wrap a model exposing a sentence-transformers style ``encode``."""
+        self.model = model
+    
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        return self.model.encode(
+            list(input),
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).tolist()
+
 class VectorStore:
     def __init__(
         self, 
         persist_directory: str = "./chroma_db",
         embedding_model: str = "all-MiniLM-L6-v2",
-        collection_name: str = "documents"
+        collection_name: str = "documents",
+        embedding_function: Optional[Any] = None,
+        query_cache_size: int = 4096,
+        hnsw_m: int = 16,
+        hnsw_construction_ef: int = 200,
+        hnsw_search_ef: int = 100,
+        use_precomputed_embeddings: bool = False
     ):
         """Initialize the vector store with ChromaDB backend.
         
@@ -30,27 +70,42 @@ class VectorStore:
             persist_directory: Directory to store the database
             embedding_model: Name of the sentence-transformers model to use
             collection_name: Name of the collection to store documents in
+            embedding_function: Optional Chroma embedding function to use instead
+                of loading ``embedding_model`` again
+            query_cache_size: Number of query embeddings to keep in memory
+            hnsw_m: Max neighbours per node in the HNSW graph
+            hnsw_construction_ef: Candidate list size while building the index
+            hnsw_search_ef: Candidate list size while querying; keep it at or
+                above the largest ``n_results`` you request
+            use_precomputed_embeddings: Store a document's 'embedding' as-is
+                instead of re-encoding its text. Only enable this when the
+                embeddings come from the same model as ``embedding_function``
         """
         self.persist_directory = Path(persist_directory)
         self.embedding_model = embedding_model
         self.collection_name = collection_name
+        self.use_precomputed_embeddings = use_precomputed_embeddings
+        self.collection_metadata = {
+            "hnsw:space": "cosine",  # Use cosine similarity
+            "hnsw:M": hnsw_m,
+            "hnsw:construction_ef": hnsw_construction_ef,
+            "hnsw:search_ef": hnsw_search_ef,
+        }
         
         # Create directory if it doesn't exist
         self.persist_directory.mkdir(parents=True, exist_ok=True)
         
-        # Initialize Chroma client
-        self.client = chromadb.Client(
-            Settings(
-                chroma_db_impl="duckdb+parquet",
-                persist_directory=str(self.persist_directory.absolute()),
-                anonymized_telemetry=False
-            )
-        )
+        # Initialize Chroma client (shared by all stores on this directory)
+        self.client = get_client(str(self.persist_directory.absolute()))
         
         # Initialize embedding function
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=embedding_model
-        )
+        self.embedding_function = embedding_function or \
+            embedding_functions.SentenceTransformerEmbeddingFunction(
+                model_name=embedding_model
+            )
+        
+        # Memoize query embeddings; the same query is often searched repeatedly
+        self._embed_query_cached = lru_cache(maxsize=query_cache_size)(self._embed_query)
         
         # Get or create collection
         self.collection = self._get_or_create_collection()
@@ -68,7 +123,7 @@ class VectorStore:
             return self.client.create_collection(
                 name=self.collection_name,
                 embedding_function=self.embedding_function,
-                metadata={"hnsw:space": "cosine"}  # Use cosine similarity
+                metadata=self.collection_metadata
             )
     
     def add_documents(
@@ -79,7 +134,9 @@ class VectorStore:
         """Add documents to the vector store.
         
         Args:
-            documents: List of document dictionaries with 'text' and 'metadata' keys
+            documents: List of document dictionaries with 'text' and 'metadata' keys,
+                and optionally a precomputed 'embedding', stored as-is when
+                ``use_precomputed_embeddings`` is enabled
             batch_size: Number of documents to process in each batch
             
         Returns:
@@ -98,11 +155,13 @@ class VectorStore:
             ids = []
             texts = []
             metadatas = []
+            embeddings = []
             
             for doc in batch:
-                doc_id = str(uuid.uuid4())
+                doc_id = uuid.uuid4().hex
                 ids.append(doc_id)
                 texts.append(doc['text'])
+                embeddings.append(doc.get('embedding'))
                 
                 # Ensure metadata is JSON-serializable
                 metadata = doc.get('metadata', {})
@@ -119,31 +178,53 @@ class VectorStore:
                 metadatas.append(metadata)
             
             # Add batch to collection
+            # Reuse precomputed embeddings so Chroma doesn't encode the texts again
+            if (not self.use_precomputed_embeddings or
+                    any(embedding is None for embedding in embeddings)):
+                embeddings = None
+            
             try:
                 self.collection.add(
                     documents=texts,
                     metadatas=metadatas,
+                    embeddings=embeddings,
                     ids=ids
                 )
                 document_ids.extend(ids)
                 logger.info(f"Added batch of {len(batch)} documents")
                 
-                # Persist after each batch
-                self.client.persist()
-                
             except Exception as e:
                 logger.error(f"Error adding batch {i//batch_size + 1}: {e}")
                 # Try to continue with next batch
                 continue
         
+        # Persist once for the whole ingest rather than after every batch
+        if document_ids:
+            self.client.persist()
+        
         return document_ids
     
+    def _embed_query(self, query: str) -> Tuple[float, ...]:
+        """Embed a single query string (uncached)."""
+        return tuple(self.embedding_function([query])[0])
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Get the embedding for a query, reusing previously computed vectors."""
+        return list(self._embed_query_cached(query))
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries with a single call to the embedding model."""
+        if not queries:
+            return []
+        return [list(embedding) for embedding in self.embedding_function(list(queries))]
+    
     def search(
         self, 
-        query: str, 
+        query: Optional[str] = None, 
         n_results: int = 5,
         filter_metadata: Optional[Dict[str, Any]] = None,
-        include: List[str] = ["documents", "metadatas", "distances"]
+        include: List[str] = ["documents", "metadatas", "distances"],
+        query_embedding: Optional[List[float]] = None
     ) -> Dict[str, List]:
         """Search for similar documents.
         
@@ -152,34 +233,87 @@ class VectorStore:
             n_results: Number of results to return
             filter_metadata: Optional metadata filters
             include: What to include in the results
+            query_embedding: Precomputed query embedding; skips encoding ``query``
             
         Returns:
             Dictionary containing search results
         """
         try:
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
+            
             results = self.collection.query(
-                query_texts=[query],
+                query_embeddings=[query_embedding],
                 n_results=n_results,
                 where=filter_metadata,
                 include=include
             )
             
-            # Convert to a more user-friendly format
-            return {
-                'documents': results['documents'][0] if 'documents' in results else [],
-                'metadatas': results['metadatas'][0] if 'metadatas' in results else [],
-                'distances': results['distances'][0] if 'distances' in results else [],
-                'ids': results['ids'][0] if 'ids' in results else []
-            }
+            return self._format_query_results(results, 0)
             
         except Exception as e:
             logger.error(f"Error searching: {e}")
-            return {
-                'documents': [],
-                'metadatas': [],
-                'distances': [],
-                'ids': []
-            }
+            return self._empty_results()
+    
+    def search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 5,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        include: List[str] = ["documents", "metadatas", "distances"]
+    ) -> List[Dict[str, List]]:
+        """Search for several query embeddings in a single collection query.
+        
+        Args:
+            query_embeddings: Precomputed query embeddings
+            n_results: Number of results to return per query
+            filter_metadata: Optional metadata filters applied to every query
+            include: What to include in the results
+            
+        Returns:
+            One result dictionary per query embedding, in the same order
+        """
+        if not query_embeddings:
+            return []
+        
+        try:
+            results = self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=filter_metadata,
+                include=include
+            )
+            
+            return [
+                self._format_query_results(results, i)
+                for i in range(len(query_embeddings))
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error searching: {e}")
+            return [self._empty_results() for _ in query_embeddings]
+    
+    @staticmethod
+    def _format_query_results(results: Dict[str, Any], index: int) -> Dict[str, List]:
+        """Convert the ``index``-th query of a Chroma result to a flat dictionary."""
+        formatted = {
+            'documents': results['documents'][index] if results.get('documents') is not None else [],
+            'metadatas': results['metadatas'][index] if results.get('metadatas') is not None else [],
+            'distances': results['distances'][index] if results.get('distances') is not None else [],
+            'ids': results['ids'][index] if 'ids' in results else []
+        }
+        if results.get('embeddings') is not None:
+            formatted['embeddings'] = results['embeddings'][index]
+        return formatted
+    
+    @staticmethod
+    def _empty_results() -> Dict[str, List]:
+        return {
+            'documents': [],
+            'metadatas': [],
+            'distances': [],
+            'ids': []
+        }
     
     def delete_documents(self, document_ids: List[str]) -> bool:
         """Delete documents by their IDs."""
@@ -211,7 +345,10 @@ class VectorStore:
     def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
         """Get a document by ID."""
         try:
-            result = self.collection.get(ids=[document_id])
+            result = self.collection.get(
+                ids=[document_id],
+                include=["documents", "metadatas", "embeddings"]
+            )
             if not result['ids']:
                 return None
                 
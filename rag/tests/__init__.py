@@ -1,4 +1,4 @@
-""
+"""
 Test suite for the Komga RAG system.
 
 This package contains all the tests for the Komga RAG system.
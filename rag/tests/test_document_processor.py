@@ -0,0 +1,158 @@
+"""
+Tests for document chunking and chunk embedding.
+"""
+
+import numpy as np
+import pytest
+
+from rag.processing import document_processor as processor_module
+from rag.processing.document_processor import DocumentProcessor
+
+class StubDoc:
+    """Parsed paragraph whose only sentence is the paragraph itself."""
+
+    def __init__(self, text):
+        self.text = text
+        self.sents = [self]
+
+class StubNLP:
+    """Stand-in for a spaCy pipeline that records the texts it is given."""
+
+    def __init__(self, max_length=1_000_000):
+        self.max_length = max_length
+        self.piped = []
+
+    def pipe(self, texts, batch_size=None):
+        for text in texts:
+            self.piped.append(text)
+            yield StubDoc(text)
+
+class StubDevice:
+    type = 'cpu'
+
+class StubModel:
+    """Stand-in for SentenceTransformer that records what it encodes."""
+
+    device = StubDevice()
+
+    def __init__(self, model_name=None, device=None):
+        self.encoded = []
+        self.fail_batch = False
+        self.fail_texts = set()
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True, normalize_embeddings=True):
+        if isinstance(texts, str):
+            if texts in self.fail_texts:
+                raise RuntimeError(f"cannot encode {texts!r}")
+            self.encoded.append(texts)
+            return np.array([float(len(texts))])
+        if self.fail_batch:
+            raise RuntimeError("out of memory")
+        self.encoded.extend(texts)
+        return np.array([[float(len(text))] for text in texts])
+
+@pytest.fixture
+def nlp():
+    return StubNLP()
+
+@pytest.fixture
+def make_processor(nlp, monkeypatch):
+    monkeypatch.setattr(processor_module, "load_spacy_model", lambda name: nlp)
+    monkeypatch.setattr(processor_module, "SentenceTransformer", StubModel)
+
+    def make(**kwargs):
+        return DocumentProcessor(**kwargs)
+
+    return make
+
+def test_paragraphs_split_on_blank_lines(make_processor, nlp):
+    """Test that blank lines, including ones holding spaces, separate paragraphs."""
+    processor = make_processor()
+    content = "First line.\nStill first.\n\nSecond.\n  \t\nThird."
+
+    assert list(processor._iter_paragraphs(content)) == [
+        "First line.\nStill first.", "Second.", "Third."
+    ]
+    assert list(processor._iter_sentences(content)) == nlp.piped
+
+def test_pdf_pages_reach_spacy_separately(make_processor, nlp):
+    """Test that pages joined with the PDF separator are parsed one by one."""
+    processor = make_processor()
+    content = processor_module.PDF_PAGE_SEPARATOR.join(["Page one.", "Page two."])
+
+    assert list(processor._iter_sentences(content)) == ["Page one.", "Page two."]
+
+@pytest.mark.parametrize("paragraph, expected", [
+    # Last line break before the limit wins over a later space
+    ("aaa\nbbb cc dd", ["aaa", "\nbbb cc dd"]),
+    # Without a line break, the last space before the limit
+    ("aaaa bbbb cccc", ["aaaa bbbb", " cccc"]),
+    # Without either, a hard cut at the limit
+    ("abcdefghijklmnopqrstuvwxy", ["abcdefghij", "klmnopqrst", "uvwxy"]),
+])
+def test_oversized_paragraphs_are_cut(make_processor, nlp, paragraph, expected):
+    """Test that paragraphs over nlp.max_length are cut into pieces that fit."""
+    nlp.max_length = 10
+    processor = make_processor()
+
+    pieces = list(processor._iter_paragraphs(paragraph))
+
+    assert pieces == expected
+    assert all(len(piece) <= nlp.max_length for piece in pieces)
+    assert ''.join(pieces) == paragraph
+
+def test_whitespace_only_pieces_are_skipped(make_processor, nlp):
+    """Test that empty paragraphs and blank cut pieces never reach spaCy."""
+    nlp.max_length = 10
+    processor = make_processor()
+    content = "\n\n   \n\n" + "a" + " " * 20 + "b" + "\n\n \n\n"
+
+    assert list(processor._iter_sentences(content)) == ["a" + " " * 8, "   b"]
+    assert list(processor._iter_paragraphs("  \n\n\t\n\n  ")) == []
+
+def test_duplicate_texts_are_encoded_once(make_processor):
+    """Test that repeated texts, within and across documents, are encoded once."""
+    processor = make_processor()
+    model = processor.embedding_model
+
+    first = processor._encode_chunks(["a", "bb", "a"])
+    second = processor._encode_chunks(["bb", "ccc"])
+
+    assert model.encoded == ["a", "bb", "ccc"]
+    assert [e.tolist() for e in first] == [[1.0], [2.0], [1.0]]
+    assert [e.tolist() for e in second] == [[2.0], [3.0]]
+
+def test_cache_is_evicted_after_the_document_is_assembled(make_processor):
+    """Test that a cached text is still reused when new texts overflow the cache."""
+    processor = make_processor(embedding_cache_size=2)
+    model = processor.embedding_model
+    processor._encode_chunks(["a"])
+
+    embeddings = processor._encode_chunks(["bb", "ccc", "a"])
+
+    assert [e.tolist() for e in embeddings] == [[2.0], [3.0], [1.0]]
+    assert model.encoded == ["a", "bb", "ccc"]
+    assert len(processor._embedding_cache) == 2
+
+    # "bb" was least recently used, so only it needs encoding again
+    processor._encode_chunks(["a", "ccc", "bb"])
+    assert model.encoded == ["a", "bb", "ccc", "bb"]
+
+def test_failed_batch_falls_back_to_single_chunks(make_processor):
+    """Test per-chunk retries after a batch failure, without caching failures."""
+    processor = make_processor()
+    model = processor.embedding_model
+    model.fail_batch = True
+    model.fail_texts = {"bad"}
+
+    embeddings = processor._encode_chunks(["good", "bad"])
+
+    assert embeddings[0].tolist() == [4.0]
+    assert embeddings[1] is None
+    assert len(processor._embedding_cache) == 1
+
+    # The failed chunk is tried again rather than served from the cache
+    model.fail_batch = False
+    model.fail_texts = set()
+    assert processor._encode_chunks(["good", "bad"])[1].tolist() == [3.0]
+    assert model.encoded == ["good", "bad"]
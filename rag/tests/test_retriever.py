@@ -0,0 +1,150 @@
+"""
+Tests for the retriever's ranking, filtering and batching.
+"""
+
+import pytest
+
+from rag.retrieval import retriever as retriever_module
+from rag.retrieval.retriever import Retriever
+
+# Candidate documents per query embedding: (id, text, cosine distance)
+CORPUS = {
+    (1.0, 0.0): [
+        ("a", "alpha", 0.1),
+        ("b", "beta", 0.3),
+        ("a2", "alpha", 0.5),
+        ("c", "gamma", 0.9),
+    ],
+    (0.0, 1.0): [
+        ("d", "delta", 0.2),
+        ("e", "epsilon", 0.4),
+    ],
+}
+
+QUERY_EMBEDDINGS = {
+    "first": [1.0, 0.0],
+    "second": [0.0, 1.0],
+}
+
+class StubVectorStore:
+    """In-memory stand-in for VectorStore that records its calls."""
+
+    def __init__(self):
+        self.search_calls = 0
+        self.batch_calls = []
+
+    def embed_query(self, query):
+        return list(QUERY_EMBEDDINGS[query])
+
+    def embed_queries(self, queries):
+        return [self.embed_query(query) for query in queries]
+
+    def _results(self, query_embedding, n_results):
+        rows = CORPUS[tuple(query_embedding)][:n_results]
+        return {
+            'ids': [row[0] for row in rows],
+            'documents': [row[1] for row in rows],
+            'metadatas': [{'id': row[0]} for row in rows],
+            'distances': [row[2] for row in rows],
+            'embeddings': [list(query_embedding) for _ in rows],
+        }
+
+    def search(self, query=None, n_results=5, filter_metadata=None,
+               include=None, query_embedding=None):
+        self.search_calls += 1
+        return self._results(query_embedding, n_results)
+
+    def search_batch(self, query_embeddings, n_results=5,
+                     filter_metadata=None, include=None):
+        self.batch_calls.append(len(query_embeddings))
+        return [self._results(embedding, n_results) for embedding in query_embeddings]
+
+class StubCrossEncoder:
+    """Scores a pair by the length of the document text."""
+
+    def predict(self, pairs):
+        return [len(doc) / 10.0 for _, doc in pairs]
+
+@pytest.fixture
+def store():
+    return StubVectorStore()
+
+@pytest.fixture
+def make_retriever(store, monkeypatch):
+    monkeypatch.setattr(retriever_module, "load_cross_encoder", lambda name: StubCrossEncoder())
+
+    def make(**kwargs):
+        kwargs.setdefault("retrieval_top_k", 10)
+        return Retriever(vector_store=store, **kwargs)
+
+    return make
+
+@pytest.mark.parametrize("use_reranking", [True, False])
+def test_batch_matches_single_query_results(make_retriever, use_reranking):
+    """Test that batch_retrieve returns what retrieve returns per query."""
+    retriever = make_retriever(use_reranking=use_reranking)
+
+    batch = retriever.batch_retrieve(["first", "second"], n_results=2)
+
+    assert batch == {
+        "first": retriever.retrieve("first", n_results=2),
+        "second": retriever.retrieve("second", n_results=2),
+    }
+
+def test_batch_searches_duplicate_queries_once(make_retriever, store):
+    """Test that repeated queries share one search and one result entry."""
+    retriever = make_retriever(use_reranking=False)
+
+    results = retriever.batch_retrieve(["first", "second", "first"], n_results=3)
+
+    assert list(results) == ["first", "second"]
+    assert store.batch_calls == [2]
+
+def test_duplicate_texts_keep_the_closest_hit(make_retriever):
+    """Test that a repeated chunk text is returned once, from its best match."""
+    retriever = make_retriever(use_reranking=False)
+
+    results = retriever.retrieve("first", n_results=10)
+
+    assert [r['text'] for r in results] == ["alpha", "beta", "gamma"]
+    assert results[0]['metadata'] == {'id': "a"}
+
+def test_score_threshold_can_filter_every_result(make_retriever):
+    """Test that no results are returned when every hit is below the threshold."""
+    retriever = make_retriever(score_threshold=0.99)
+
+    assert retriever.retrieve("first", n_results=3) == []
+    assert retriever.batch_retrieve(["first"], n_results=3) == {"first": []}
+
+def test_score_threshold_drops_weak_results(make_retriever):
+    """Test that only hits at or above the threshold reach ranking."""
+    retriever = make_retriever(use_reranking=False, score_threshold=0.8)
+
+    results = retriever.retrieve("first", n_results=10)
+
+    # Similarity is 1 - distance / 2: alpha 0.95, beta 0.85, gamma 0.55
+    assert [r['text'] for r in results] == ["alpha", "beta"]
+
+@pytest.mark.parametrize("use_reranking", [True, False])
+def test_zero_results_requested(make_retriever, use_reranking):
+    """Test that asking for no results returns an empty list."""
+    retriever = make_retriever(use_reranking=use_reranking)
+
+    assert retriever.retrieve("first", n_results=0) == []
+    assert retriever.batch_retrieve(["first"], n_results=0) == {"first": []}
+
+@pytest.mark.parametrize("n_results", [1, 2, 3, 5, 8])
+def test_rerank_ties_keep_first_stage_order(make_retriever, n_results):
+    """Test that equally scored candidates stay in their first-stage order."""
+    retriever = make_retriever()
+    documents = ["aa", "bb", "c", "dd", "ee", "f", "gg", "hh"]
+    results = {
+        'documents': documents,
+        'metadatas': [{'rank': i} for i in range(len(documents))],
+        'distances': [0.2] * len(documents),
+    }
+
+    reranked = retriever._rerank_with_cross_encoder("query", results, n_results)
+
+    expected = sorted(range(len(documents)), key=lambda i: -len(documents[i]))[:n_results]
+    assert [r['metadata']['rank'] for r in reranked] == expected
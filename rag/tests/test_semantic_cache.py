@@ -0,0 +1,50 @@
+"""
+Tests for the retrieval semantic cache.
+"""
+
+import pytest
+
+from rag.retrieval.semantic_cache import SemanticCache
+
+def test_lookup_returns_value_for_similar_query():
+    """Test that a near-identical embedding hits the cache."""
+    cache = SemanticCache(similarity_threshold=0.9)
+    cache.put([1.0, 0.0, 0.0], "cached")
+
+    assert cache.lookup([0.99, 0.05, 0.0]) == "cached"
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+
+def test_lookup_requires_matching_key():
+    """Test that entries are only reused for the same search parameters."""
+    cache = SemanticCache()
+    cache.put([1.0, 0.0], "five results", key=5)
+
+    assert cache.lookup([1.0, 0.0], key=5) == "five results"
+    assert cache.lookup([1.0, 0.0], key=10) is None
+
+def test_least_recently_used_entry_is_evicted():
+    """Test LRU eviction once the cache is full."""
+    cache = SemanticCache(max_size=2)
+    cache.put([1.0, 0.0, 0.0], "a")
+    cache.put([0.0, 1.0, 0.0], "b")
+    cache.lookup([1.0, 0.0, 0.0])
+    cache.put([0.0, 0.0, 1.0], "c")
+
+    assert len(cache) == 2
+    assert cache.lookup([1.0, 0.0, 0.0]) == "a"
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.lookup([0.0, 0.0, 1.0]) == "c"
+
+def test_clear():
+    """Test that clear drops all entries."""
+    cache = SemanticCache()
+    cache.put([1.0, 0.0], "cached")
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.lookup([1.0, 0.0]) is None
+
+def test_max_size_must_be_positive():
+    """Test that an empty cache size is rejected up front."""
+    with pytest.raises(ValueError):
+        SemanticCache(max_size=0)
@@ -0,0 +1,51 @@
+"""
+Tests for LLM enhancement in the thematic analyzer.
+"""
+
+import json
+
+from rag.analysis.thematic_analyzer import Theme, ThematicAnalyzer, ThemeType
+
+class StubLLMService:
+    """Answers every prompt with JSON, except prompts about a failing theme."""
+
+    def __init__(self, failing_theme):
+        self.failing_theme = failing_theme
+        self.prompts = []
+
+    def generate(self, prompt):
+        self.prompts.append(prompt)
+        if f'"{self.failing_theme}"' in prompt:
+            raise RuntimeError("service unavailable")
+        name = prompt.split('"')[1]
+        return json.dumps({
+            'description': f"enhanced {name}",
+            'type': ThemeType.SYMBOLIC.value,
+            'analysis': f"analysis of {name}",
+        })
+
+def make_theme(name):
+    return Theme(
+        name=name,
+        description=f"original {name}",
+        theme_type=ThemeType.MINOR,
+        confidence=0.8,
+        supporting_quotes=[],
+        metadata={'occurrences': 3}
+    )
+
+def test_failed_llm_request_skips_only_its_theme():
+    """Test that one failing generate() call leaves the other themes enhanced."""
+    llm = StubLLMService(failing_theme="memory")
+    analyzer = ThematicAnalyzer(llm_service=llm, llm_concurrency=2)
+    themes = [make_theme(name) for name in ["love", "war", "memory", "home", "time"]]
+
+    enhanced = analyzer._enhance_with_llm(themes, "some text")
+
+    assert len(llm.prompts) == 5
+    assert [theme.description for theme in enhanced] == [
+        "enhanced love", "enhanced war", "original memory", "enhanced home", "enhanced time"
+    ]
+    assert enhanced[2].theme_type == ThemeType.MINOR
+    assert 'llm_analysis' not in enhanced[2].metadata
+    assert enhanced[4].metadata['llm_analysis'] == "analysis of time"
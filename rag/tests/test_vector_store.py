@@ -0,0 +1,78 @@
+"""
+Tests for adding documents to the vector store.
+"""
+
+import pytest
+
+from rag.retrieval import vector_store as vector_store_module
+from rag.retrieval.vector_store import VectorStore
+
+class StubCollection:
+    """Records the arguments of every add call."""
+
+    def __init__(self):
+        self.added = []
+
+    def add(self, documents, metadatas, embeddings, ids):
+        self.added.append({'documents': documents, 'embeddings': embeddings})
+
+class StubClient:
+    """Stand-in for a Chroma client holding a single collection."""
+
+    def __init__(self):
+        self.collection = StubCollection()
+
+    def get_collection(self, name, embedding_function=None):
+        return self.collection
+
+    def persist(self):
+        pass
+
+@pytest.fixture
+def client(monkeypatch):
+    client = StubClient()
+    monkeypatch.setattr(vector_store_module, "get_client", lambda persist_directory: client)
+    return client
+
+@pytest.fixture
+def make_store(client, tmp_path):
+    def make(**kwargs):
+        return VectorStore(
+            persist_directory=str(tmp_path),
+            embedding_function=lambda input: [[0.0] for _ in input],
+            **kwargs
+        )
+
+    return make
+
+def docs(*embeddings):
+    return [
+        {'text': f"doc {i}", 'metadata': {}, 'embedding': embedding}
+        for i, embedding in enumerate(embeddings)
+    ]
+
+def test_embeddings_are_ignored_by_default(make_store, client):
+    """Test that a plain store lets Chroma encode the texts itself."""
+    store = make_store()
+
+    store.add_documents(docs([0.1, 0.2], [0.3, 0.4]))
+
+    assert client.collection.added[0]['embeddings'] is None
+
+def test_opted_in_store_passes_embeddings_through(make_store, client):
+    """Test that precomputed vectors are stored when every doc has one."""
+    store = make_store(use_precomputed_embeddings=True)
+
+    store.add_documents(docs([0.1, 0.2], [0.3, 0.4]))
+
+    assert client.collection.added[0]['embeddings'] == [[0.1, 0.2], [0.3, 0.4]]
+
+def test_batch_with_missing_embedding_is_reencoded(make_store, client):
+    """Test that one doc without an embedding makes Chroma encode its whole batch."""
+    store = make_store(use_precomputed_embeddings=True)
+
+    store.add_documents(docs([0.1, 0.2], None, [0.5, 0.6], [0.7, 0.8]), batch_size=2)
+
+    assert [call['embeddings'] for call in client.collection.added] == [
+        None, [[0.5, 0.6], [0.7, 0.8]]
+    ]